@@ -1,3 +1,4 @@
+import os
 import numpy as np
 import pandas as pd
 from PIL import Image
@@ -5,6 +6,11 @@ from typing import Union
 
 np.set_printoptions(threshold=np.inf, linewidth=300)
 
+# Human readable symbol for every cell value, indexed by value + 1
+# (-1 is a wall, 0 is not used in the maps). Values outside the table
+# are shown as str(value), which needs up to 4 characters for int8
+SYMBOLS = np.array([' # ', '0', ' . ', ' , ', ' : ', ' ; '], dtype='<U4')
+
 # Original code by Håkon Måløy
 # Extended and documented by Xavier Sánchez-Díaz
 
@@ -52,6 +58,8 @@ class Map_Obj():
         Reads maps specified in path from file, converts them to numpy
         array and a string array. Then replaces specific values in the
         string array with predefined values more suitable for printing.
+        The integer map is cached as `path + '.npy'` so later reads do
+        not have to parse the CSV file again.
 
         Parameters
         ----------
@@ -64,23 +72,46 @@ class Map_Obj():
             A tuple of the map as an ndarray of integers,
             and the map as a string of symbols.
         """
-        # Read map from provided csv file
-        df = pd.read_csv(path, index_col=None,
-                         header=None)  # ,error_bad_lines=False)
-        # Convert pandas dataframe to numpy array
-        data = df.values
-        # Convert numpy array to string to make it more human readable
-        data_str = data.astype(str)
-        # Replace numeric values with more human readable symbols
-        data_str[data_str == '-1'] = ' # '
-        data_str[data_str == '1'] = ' . '
-        data_str[data_str == '2'] = ' , '
-        data_str[data_str == '3'] = ' : '
-        data_str[data_str == '4'] = ' ; '
+        # Reuse the parsed map from the .npy cache next to the csv file
+        # if it is newer than the csv file
+        cache = path + '.npy'
+        if os.path.exists(cache) and \
+                os.path.getmtime(cache) >= os.path.getmtime(path):
+            # Copy-on-write, so the map can still be changed in memory.
+            # np.asarray so int_map is a plain ndarray like on the first read
+            data = np.asarray(np.load(cache, mmap_mode='c'))
+        else:
+            # Read map from provided csv file. Costs are in {-1, 1, 2, 3, 4}
+            # so they fit in int8
+            df = pd.read_csv(path, index_col=None,
+                             header=None, dtype=np.int8)
+            # Convert pandas dataframe to numpy array
+            data = df.values
+            # Write to a temporary file first, so maps read in parallel
+            # never see a partly written cache
+            tmp = cache + '.' + str(os.getpid()) + '.tmp'
+            try:
+                with open(tmp, 'wb') as f:
+                    np.save(f, data)
+                os.replace(tmp, cache)
+            except OSError:
+                # Not being able to write the cache is not an error,
+                # but do not leave a partly written file behind
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+        # Convert numeric values to more human readable symbols
+        index = data.astype(np.intp) + 1
+        in_table = (index >= 0) & (index < len(SYMBOLS))
+        data_str = SYMBOLS[np.where(in_table, index, 0)]
+        # Values without a symbol are shown as they are
+        data_str[~in_table] = data[~in_table].astype(str)
         return data, data_str
 
-    def fill_critical_positions(self, task: int) -> tuple[list[int], list[int],
-                                                          list[int], str]:
+    def fill_critical_positions(self, task: int) -> tuple[tuple[int, int],
+                                                          tuple[int, int],
+                                                          tuple[int, int], str]:
         """
         Fill the important positions for the current task. Given the
         task, the path to the correct map is set, and the start, goal
@@ -93,45 +124,45 @@ class Map_Obj():
 
         Returns
         -------
-        tuple[list[int], list[int], list[int], str]
+        tuple[tuple[int, int], tuple[int, int], tuple[int, int], str]
             Start position
             Initial goal position
             End goal position
             Path to map for current task
         """
         if task == 1:
-            start_pos = [27, 18]
-            goal_pos = [40, 32]
+            start_pos = (27, 18)
+            goal_pos = (40, 32)
             end_goal_pos = goal_pos
             path_to_map = 'Samfundet_map_1.csv'
         elif task == 2:
-            start_pos = [40, 32]
-            goal_pos = [8, 5]
+            start_pos = (40, 32)
+            goal_pos = (8, 5)
             end_goal_pos = goal_pos
             path_to_map = 'Samfundet_map_1.csv'
         elif task == 3:
-            start_pos = [28, 32]
-            goal_pos = [6, 32]
+            start_pos = (28, 32)
+            goal_pos = (6, 32)
             end_goal_pos = goal_pos
             path_to_map = 'Samfundet_map_2.csv'
         elif task == 4:
-            start_pos = [28, 32]
-            goal_pos = [6, 32]
+            start_pos = (28, 32)
+            goal_pos = (6, 32)
             end_goal_pos = goal_pos
             path_to_map = 'Samfundet_map_Edgar_full.csv'
         elif task == 5:
-            start_pos = [14, 18]
-            goal_pos = [6, 36]
-            end_goal_pos = [6, 7]
+            start_pos = (14, 18)
+            goal_pos = (6, 36)
+            end_goal_pos = (6, 7)
             path_to_map = 'Samfundet_map_2.csv'
 
         return start_pos, goal_pos, end_goal_pos, path_to_map
 
-    def get_cell_value(self, pos: list[int, int]) -> int:
+    def get_cell_value(self, pos: tuple[int, int]) -> int:
         """Getter for the value (cost) of the cell at `pos`"""
         return self.int_map[pos[0], pos[1]]
 
-    def get_goal_pos(self) -> list[int, int]:
+    def get_goal_pos(self) -> tuple[int, int]:
         """Getter for the goal position of the current task"""
         return self.goal_pos
 
@@ -148,7 +179,7 @@ class Map_Obj():
         # Return the map in both int and string format
         return self.int_map, self.str_map
 
-    def move_goal_pos(self, pos: list[int, int]):
+    def move_goal_pos(self, pos: tuple[int, int]):
         """
         Moves the goal position towards `pos`. Moves the current goal
         position and replaces its previous position with the previous
@@ -156,25 +187,26 @@ class Map_Obj():
 
         Parameters
         ----------
-        pos : list[int, int]
+        pos : tuple[int, int]
             New position of the goal
         """
         tmp_val = self.tmp_cell_value
         tmp_pos = self.goal_pos
         self.tmp_cell_value = self.get_cell_value(pos)
-        self.goal_pos = [pos[0], pos[1]]
+        self.goal_pos = (pos[0], pos[1])
         self.replace_map_values(tmp_pos, tmp_val, self.goal_pos)
 
-    def set_cell_value(self, pos: list[int, int], value: int,
+    def set_cell_value(self, pos: tuple[int, int], value: int,
                        str_map: bool = True):
         """Helper function to set the `value` of the cell at `pos`
 
         Parameters
         ----------
-        pos : list[int, int]
+        pos : tuple[int, int]
             Position of cell to be updated
         value : int
-            New value (cost) of the cell
+            New value (cost) of the cell. The integer map is stored as
+            int8, so costs must be in the range [-128, 127].
         str_map : bool, optional
             A flag to know which map to update. By default, the
             string map is updated.
@@ -182,67 +214,78 @@ class Map_Obj():
         if str_map:
             self.str_map[pos[0], pos[1]] = value
         else:
+            self.check_int_value(value)
             self.int_map[pos[0], pos[1]] = value
 
+    def check_int_value(self, value: int):
+        """Raises a ValueError if `value` does not fit in the integer map
+
+        Parameters
+        ----------
+        value : int
+            Value (cost) that is about to be written to the integer map
+        """
+        info = np.iinfo(self.int_map.dtype)
+        if not info.min <= value <= info.max:
+            raise ValueError('The value ' + str(value) + ' does not '
+                             'fit in the integer map (' + str(info.min) +
+                             ' to ' + str(info.max) + ').')
+
     def print_map(self, map_to_print: Union[np.ndarray, str]):
         """Helper function to print `map_to_print` in the console"""
         for column in map_to_print:
             print(column)
 
-    def pick_move(self) -> list[int, int]:
+    def pick_move(self) -> tuple[int, int]:
         """
         Calculate new end_goal position based on the current position.
 
         Returns
         -------
-        pos : list[int, int]
+        pos : tuple[int, int]
             New position of the goal.
         """
         if self.goal_pos[0] < self.end_goal_pos[0]:
-            return [self.goal_pos[0] + 1, self.goal_pos[1]]
+            return (self.goal_pos[0] + 1, self.goal_pos[1])
         elif self.goal_pos[0] > self.end_goal_pos[0]:
-            return [self.goal_pos[0] - 1, self.goal_pos[1]]
+            return (self.goal_pos[0] - 1, self.goal_pos[1])
         elif self.goal_pos[1] < self.end_goal_pos[1]:
-            return [self.goal_pos[0], self.goal_pos[1] + 1]
+            return (self.goal_pos[0], self.goal_pos[1] + 1)
         else:
-            return [self.goal_pos[0], self.goal_pos[1] - 1]
+            return (self.goal_pos[0], self.goal_pos[1] - 1)
 
-    def replace_map_values(self, pos: list[int, int], value: int,
-                           goal_pos: list[int, int]):
+    def replace_map_values(self, pos: tuple[int, int], value: int,
+                           goal_pos: tuple[int, int]):
         """Replaces the values of the coordinates provided in
         both maps (int and str).
 
         Parameters
         ----------
-        pos : list[int, int]
+        pos : tuple[int, int]
             Coordinates for where we want to change the values
         value : int
-            The value we want to change to
-        goal_pos : list[int, int]
+            The value we want to change to. The integer map is stored
+            as int8, so it must be in the range [-128, 127].
+        goal_pos : tuple[int, int]
             Coordinates of the current goal
         """
-        if value == 1:
-            str_value = ' . '
-        elif value == 2:
-            str_value = ' , '
-        elif value == 3:
-            str_value = ' : '
-        elif value == 4:
-            str_value = ' ; '
+        self.check_int_value(value)
+        if 0 <= int(value) + 1 < len(SYMBOLS):
+            str_value = SYMBOLS[int(value) + 1]
         else:
             str_value = str(value)
         self.int_map[pos[0]][pos[1]] = value
         self.str_map[pos[0]][pos[1]] = str_value
         self.str_map[goal_pos[0], goal_pos[1]] = ' G '
 
-    def tick(self) -> list[int, int]:
+    def tick(self) -> tuple[int, int]:
         """
         Moves the current goal position every 4th call if current goal
         position is not already at the end_goal position.
 
         Returns
         -------
-        pos : list[int, int]
+        pos : tuple[int, int]
             New position of the goal.
         """
         # For every 4th call, actually do something
@@ -262,13 +305,13 @@ class Map_Obj():
 
         return self.goal_pos
 
-    def set_start_pos_str_marker(self, start_pos: list[int, int],
+    def set_start_pos_str_marker(self, start_pos: tuple[int, int],
                                  themap: Union[np.ndarray, str]):
         """Sets the start position marker at `start_pos` in `map`
 
         Parameters
         ----------
-        start_pos : list[int, int]
+        start_pos : tuple[int, int]
             Position which we want to mark as the start
         themap : np.ndarray or str
             Map in which we want to change the starting position
@@ -282,13 +325,13 @@ class Map_Obj():
         else:
             themap[start_pos[0]][start_pos[1]] = ' S '
 
-    def set_goal_pos_str_marker(self, goal_pos: list[int, int],
+    def set_goal_pos_str_marker(self, goal_pos: tuple[int, int],
                                 themap: Union[np.ndarray, str]):
         """Set the goal position marker at `goal_pos` in `map`
 
         Parameters
         ----------
-        goal_pos : list[int, int]
+        goal_pos : tuple[int, int]
             Position which we want to mark as the goal
         themap : np.ndarray or str
             Map in which we want to change the goal position
@@ -323,11 +366,6 @@ class Map_Obj():
         height = themap.shape[0]
         # Define scale of the image
         scale = 20
-        # Create an all-yellow image
-        image = Image.new('RGB', (width * scale, height * scale),
-                          (255, 255, 0))
-        # Load image
-        pixels = image.load()
 
         # Define what colors to give to different values of the string map
         # (undefined values will remain yellow, this is
@@ -341,14 +379,14 @@ class Map_Obj():
             ' S ': (255, 0, 255),  # magenta
             ' G ': (0, 128, 255)   # cyan
         }
-        # Go through image and set pixel color for every position
-        for y in range(height):
-            for x in range(width):
-                if themap[y][x] not in colors:
-                    continue
-                for i in range(scale):
-                    for j in range(scale):
-                        pixels[x * scale + i,
-                               y * scale + j] = colors[themap[y][x]]
+        # Start with an all-yellow image, one pixel per cell
+        rgb = np.full((height, width, 3), (255, 255, 0), dtype=np.uint8)
+        # Set the color of every cell, one symbol at a time
+        themap = np.asarray(themap)
+        for symbol, color in colors.items():
+            rgb[themap == symbol] = color
+        # Scale every cell up to a `scale` x `scale` block of pixels
+        rgb = np.repeat(np.repeat(rgb, scale, axis=0), scale, axis=1)
+        image = Image.fromarray(rgb, 'RGB')
         # Show image
         image.show()
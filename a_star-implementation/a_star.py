@@ -1,50 +1,37 @@
 from Map import Map_Obj
+import numpy as np
 import heapq
+import itertools
+from multiprocessing import Pool
+import os
 
-class Node:
-    
-    """
-    Constructor for Node object
-    
-    This class stores the position, parent node and cost for a node/cell
+# Offsets (row, column) of the four neighbors of a cell
+NEIGHBORS = ((-1, 0), (1, 0), (0, -1), (0, 1))
 
-    __lt__ Overrides the < operator to use the total cost for nodes when comparing node1 < node2. This is used for ordering of nodes in the priority queue used in the algorithm.
+def heuristic_map(shape, goal, mode=1):
     """
-    def __init__(self, position, parent=None):
-        self.position = position
-        self.parent = parent # Parent node
-        self.actual = 0  # Actual cost
-        self.heuristic = 0  # Heuristic cost
-        self.total = 0  # Total cost (Actual cost + Heuristic cost)
-
-    # Override < operator behavior for priority queue
-    def __lt__(self, other):
-        return self.total < other.total
-    
-
-
-def heuristic(node, goal_node, mode=1):
-    """
-    Calculate the heuristic estimate from the current node to the goal node.
+    Calculate the heuristic estimate from every position on the map to the goal position.
+    The table is computed once per search, so the search only has to look the estimate up for every cell.
 
     Parameters:
-    - node (Node): The current node
-    - goal_node (Node): The goal node
+    - shape (tuple): The shape (rows, columns) of the map
+    - goal (tuple): The goal position (row, column)
     - mode (int): The heuristic calculation mode. Defaults to 1. 
         - 1: Manhattan distance
         - 2: Euclidean distance
 
     Returns:
-    - float: The heuristic estimate from the current node to the goal node.
+    - np.ndarray: Array of the given shape with the heuristic estimate from each position to the goal position.
     """
-    x = abs(node.position[0] - goal_node.position[0])
-    y = abs(node.position[1] - goal_node.position[1])
-    
+    rows, columns = np.ogrid[:shape[0], :shape[1]]
+    x = np.abs(rows - goal[0])
+    y = np.abs(columns - goal[1])
+
     # Mode 1 is manhattan distance 
     if mode == 1:
         return x + y
-    # Mode 2 is euclidian distance
-    return x**2+y**2
+    # Mode 2 is euclidian distance. Both never overestimate the cost on a 4-connected grid where every step costs at least 1
+    return np.sqrt(x**2 + y**2)
 
 def a_star(map, start, goal, heuristic_mode):
     """
@@ -56,7 +43,9 @@ def a_star(map, start, goal, heuristic_mode):
         goal: tuple(x,y) of the goal position
         heuristic_mode: 
 
-    The function uses a priority queue to store nodes in a list, sorted by their cost.
+    The function uses a priority queue of (total cost, counter, cell index) tuples, where the cell index of (r, c) is r * W + c.
+    The counter increases with every push, so cells with the same total cost are evaluated in the order they were added.
+    The costs, parents and evaluated flags of the cells are kept in flat arrays indexed by the same cell index.
 
     Returns:
         A list of coordinates representing the path from start to goal
@@ -66,106 +55,143 @@ def a_star(map, start, goal, heuristic_mode):
         Research for algorithm was done at https://saturncloud.io/blog/implementing-the-a-algorithm-in-python-a-stepbystep-guide/
 
     """
-    # Create start and goal nodes
-    start_node = Node(start)
-    goal_node = Node(goal)
+    # Read the grid once instead of going through map.get_cell_value for every neighbor
+    grid = map.int_map
+    H, W = grid.shape
 
-    # Initialize open and closed lists
-    # Open list represent the nodes that are yet to be evaluated
-    # Closed list represents the nodes that have already been evaluated (this is to make sure that no duplicate nodes are evaluated when checking neighbors or children)
-    open_list = []
-    closed_list = []
+    # Heuristic estimate of every cell, as a flat list indexed by cell index
+    h = heuristic_map(grid.shape, goal, heuristic_mode).ravel().tolist()
+
+    start_idx = start[0] * W + start[1]
+    goal_idx = goal[0] * W + goal[1]
 
-    # Add the start node to the open list
-    heapq.heappush(open_list, start_node)
+    # g holds the cheapest actual cost found so far for every cell
+    # parent holds the index of the cell each cell was reached from (-1 for none)
+    # closed marks the cells that have been evaluated at their current cost. A cell is re-opened if a cheaper path to it is found later
+    g = np.full(H * W, np.iinfo(np.int32).max, dtype=np.int32)
+    parent = np.full(H * W, -1, dtype=np.int32)
+    closed = np.zeros(H * W, dtype=np.uint8)
+
+    # Open list represent the cells that are yet to be evaluated
+    open_list = []
+    counter = itertools.count()
+    g[start_idx] = 0
+    heapq.heappush(open_list, (h[start_idx], next(counter), start_idx))
 
     # Loop until the open list is empty
     while open_list:
-        # Get the node with the lowest cost from the open list
-        current_node = heapq.heappop(open_list)
-        
-        # Appends 
-        closed_list.append(tuple(current_node.position))
-
-        # If we have reached the goal node, return the path
-        if current_node.position == goal_node.position:
-            return path_to_goal(current_node)
-
-        # Generate children of the current node
-        children = []
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-            child_position = (current_node.position[0] + dy, current_node.position[1] + dx)
-
-            # Skips the walls (cost -1)
-            if map.get_cell_value(list(child_position)) == -1:
-                continue
+        # Get the cell with the lowest cost from the open list
+        _, _, idx = heapq.heappop(open_list)
+
+        # Skip stale entries, the cell has already been evaluated at its current cost
+        if closed[idx]:
+            continue
+        closed[idx] = 1
+
+        # If we have reached the goal, return the path
+        if idx == goal_idx:
+            return path_to_goal(parent, idx, W)
+
+        current_r, current_c = divmod(idx, W)
+        current_g = g[idx]
 
-            child_node = Node(child_position, current_node)
-            # Adds child nod to children list
-            children.append(child_node)
+        # Evaluate the neighbors (children) of the current cell
+        for dr, dc in NEIGHBORS:
+            r = current_r + dr
+            c = current_c + dc
 
-        # Iterate over children list and check whether node has already been evaluated
-        for child in children:
-            if tuple(child.position) in closed_list:
+            # Skips positions outside the map
+            if r < 0 or r >= H or c < 0 or c >= W:
+                continue
+            # Walls have cost -1, so a single read gives both the wall check and the cost
+            cost = grid[r, c]
+            if cost < 0:
                 continue
 
-            # Calculate costs
-            add_costs(map, child, child_position, current_node, goal_node, heuristic_mode)
+            # Only keep the child if it is cheaper than any path to it found so far
+            tentative = current_g + cost
+            child_idx = r * W + c
+            if tentative >= g[child_idx]:
+                continue
+            g[child_idx] = tentative
+            parent[child_idx] = idx
+            closed[child_idx] = 0
 
-            if child not in open_list:
-                heapq.heappush(open_list, child)
+            total = tentative + h[child_idx]
+            heapq.heappush(open_list, (total, next(counter), child_idx))
 
     # If no path is found, return None
     return None
 
-def add_costs(map, child, child_position, current_node, goal_node, heuristic_mode):
-    """
-    Calculate the costs for a given child node during the A* search.
-    
-    The function calculates the following:
-        a: The actual cost from the start node to the child node.
-        h: The estimated cost (heuristic) from the child node to the goal node.
-        t: The total cost which is the sum of a and h.
-    """
-    child.actual = current_node.actual + map.get_cell_value(list(child_position))
-    child.heuristic = heuristic(child, goal_node, heuristic_mode)
-    child.total = child.actual + child.heuristic
-
-def path_to_goal(node):
+def path_to_goal(parent, idx, W):
     """
-    Constructs a path from the start node to the given node by backtracking through the parent nodes.
+    Constructs a path from the start cell to the given cell by backtracking through the parent array.
 
     Parameters:
-        node: current node
+        parent: array of parent cell indices
+        idx: index of the current cell
+        W: width of the map
     
     Returns:
         path: path from start to goal (tuples(x,y))
 
     """
-    # Initialize an empty list to store the path
-    path = []
+    # Count the cells on the path first, so the path can be filled in
+    # from the end without reversing it afterwards
+    length = 0
+    node = idx
+    while node != -1:
+        length += 1
+        node = parent[node]
+
+    path = [None] * length
+
+    # Iterate backwards using the parent of each cell
+    for i in range(length - 1, -1, -1):
+        path[i] = divmod(int(idx), W)
+        idx = parent[idx]
+
+    return path
+
+def solve(task, heuristic_mode=1):
+    """
+    Solve a single task with the A* algorithm.
 
-    # Iterate backwards using parent node or each node
-    while node is not None:
-        path.append(node.position)
-        node = node.parent
+    Parameters:
+        task: number of the task to solve
+        heuristic_mode: 1 for manhattan, 2 for euclidian
 
-    # Return the reversed path to get the correct order
-    return path[::-1]
+    Returns:
+        The map_obj of the task, so the path can be drawn on it without loading the map again
+        A list of coordinates representing the path from start to goal
+        If no path is found the path is None
+    """
+    samfundet_map = Map_Obj(task)
+    start = samfundet_map.get_start_pos()
+    goal = samfundet_map.get_goal_pos()
+    return samfundet_map, a_star(samfundet_map, start, goal, heuristic_mode)
 
 if __name__ == "__main__":
-    task = 4
-    samfundet_map1 = Map_Obj(task)
-    start = samfundet_map1.get_start_pos()
-    goal = samfundet_map1.get_goal_pos()
-    #The last parameter in a_star() is the heuristic mode (1 for manhattan, 2 for euclidian)
-    path = a_star(samfundet_map1, tuple(start), tuple(goal), 1)
-    if path:
+    tasks = range(1, 6)
+    # The tasks are independent of each other, so they are solved in parallel.
+    # With a single CPU the process startup costs more than the searches, so they are solved in order instead
+    processes = min(len(tasks), os.cpu_count() or 1)
+    if processes > 1:
+        with Pool(processes) as pool:
+            results = pool.map(solve, tasks)
+    else:
+        results = [solve(task) for task in tasks]
+
+    for task, (samfundet_map1, path) in zip(tasks, results):
+        print(f'Task: {task}')
+        if path is None:
+            print(' No path found')
+            continue
+
         for pos in path:
             if pos == path[0] or pos == path[len(path) - 1]:
                 continue
             samfundet_map1.set_cell_value(pos, ' G ')
 
-    print(f'Task: {task}')
-    print(f' Cost: {len(path)}')
-    samfundet_map1.show_map()
\ No newline at end of file
+        print(f' Cost: {len(path)}')
+        samfundet_map1.show_map()
@@ -0,0 +1,158 @@
+# distutils: language=c++
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Cython implementation of the A* search over the integer map.
+
+Build it in place before importing it, for example with
+    cythonize -i a_star_cy.pyx
+(add -O3 -march=native to CFLAGS for the fastest build).
+"""
+from libc.math cimport sqrt
+from libc.stdlib cimport malloc, free
+from a_star import path_to_goal
+import numpy as np
+
+cdef struct HeapEntry:
+    int f    # Total cost (actual cost + heuristic cost)
+    int idx  # Cell index, r * W + c
+
+
+cdef inline int _heappush(HeapEntry* heap, int size, int f, int idx) noexcept nogil:
+    """Push (f, idx) onto the heap and return the new size of the heap"""
+    cdef int i = size
+    cdef int parent
+    while i > 0:
+        parent = (i - 1) >> 1
+        if heap[parent].f <= f:
+            break
+        heap[i] = heap[parent]
+        i = parent
+    heap[i].f = f
+    heap[i].idx = idx
+    return size + 1
+
+
+cdef inline int _heappop(HeapEntry* heap, int size) noexcept nogil:
+    """Remove the entry with the lowest total cost and return its cell index"""
+    cdef int top = heap[0].idx
+    cdef HeapEntry last = heap[size - 1]
+    cdef int i = 0
+    cdef int child
+    size -= 1
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            break
+        if child + 1 < size and heap[child + 1].f < heap[child].f:
+            child += 1
+        if last.f <= heap[child].f:
+            break
+        heap[i] = heap[child]
+        i = child
+    heap[i] = last
+    return top
+
+
+cdef inline int _heuristic(int r, int c, int gr, int gc, int mode) noexcept nogil:
+    cdef int dr = r - gr if r > gr else gr - r
+    cdef int dc = c - gc if c > gc else gc - c
+    if mode == 1:
+        return dr + dc
+    # Costs are integers, so rounding the distance down keeps it admissible
+    return <int>sqrt(<double>(dr * dr + dc * dc))
+
+
+def astar_c(const signed char[:, :] grid, int sr, int sc, int gr, int gc, int mode=1):
+    """
+    A* search over the integer map.
+
+    Parameters:
+        grid: 2D int8 array of cell costs, walls are -1
+        sr, sc: row and column of the start position
+        gr, gc: row and column of the goal position
+        mode: The heuristic calculation mode. Defaults to 1.
+            - 1: Manhattan distance
+            - 2: Euclidean distance, rounded down
+
+    Returns:
+        parent: int32 array of length H * W holding the index of the cell each cell was reached from (-1 for none)
+    """
+    cdef int H = grid.shape[0]
+    cdef int W = grid.shape[1]
+    cdef int n = H * W
+
+    parent_arr = np.full(n, -1, dtype=np.int32)
+    g_arr = np.full(n, np.iinfo(np.int32).max, dtype=np.int32)
+    closed_arr = np.zeros(n, dtype=np.uint8)
+    cdef int[:] parent = parent_arr
+    cdef int[:] g = g_arr
+    cdef unsigned char[:] closed = closed_arr
+
+    # Every relaxation pushes an entry, so each cell is pushed at most once per neighbor
+    cdef HeapEntry* heap = <HeapEntry*> malloc((4 * n + 1) * sizeof(HeapEntry))
+    if heap == NULL:
+        raise MemoryError()
+
+    cdef int size = 0
+    cdef int goal_idx = gr * W + gc
+    cdef int idx, r, c, k, nr, nc, child_idx, cost, tentative
+    cdef int dr[4]
+    cdef int dc[4]
+    dr[:] = [-1, 1, 0, 0]
+    dc[:] = [0, 0, -1, 1]
+
+    with nogil:
+        g[sr * W + sc] = 0
+        size = _heappush(heap, size, _heuristic(sr, sc, gr, gc, mode), sr * W + sc)
+
+        while size > 0:
+            idx = _heappop(heap, size)
+            size -= 1
+
+            # Skip stale entries, the cell has already been evaluated at its current cost
+            if closed[idx]:
+                continue
+            closed[idx] = 1
+
+            if idx == goal_idx:
+                break
+
+            r = idx // W
+            c = idx % W
+            for k in range(4):
+                nr = r + dr[k]
+                nc = c + dc[k]
+                if nr < 0 or nr >= H or nc < 0 or nc >= W:
+                    continue
+                cost = grid[nr, nc]
+                # Skips the walls (cost -1)
+                if cost < 0:
+                    continue
+
+                child_idx = nr * W + nc
+                tentative = g[idx] + cost
+                if tentative >= g[child_idx]:
+                    continue
+                g[child_idx] = tentative
+                parent[child_idx] = idx
+                closed[child_idx] = 0
+                size = _heappush(heap, size, tentative + _heuristic(nr, nc, gr, gc, mode), child_idx)
+
+    free(heap)
+    return parent_arr
+
+
+def a_star(map, start, goal, heuristic_mode):
+    """
+    Same interface as a_star.a_star, but runs the search with astar_c.
+
+    Returns:
+        A list of coordinates representing the path from start to goal
+        If no path is found it returns None
+    """
+    W = map.int_map.shape[1]
+    parent = astar_c(map.int_map, start[0], start[1], goal[0], goal[1], heuristic_mode)
+    goal_idx = goal[0] * W + goal[1]
+    if goal_idx != start[0] * W + start[1] and parent[goal_idx] == -1:
+        return None
+    return path_to_goal(parent, goal_idx, W)
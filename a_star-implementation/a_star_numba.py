@@ -0,0 +1,186 @@
+from Map import Map_Obj
+from a_star import path_to_goal
+from numba import njit
+import numpy as np
+
+INT_MAX = np.iinfo(np.int32).max
+
+
+@njit(cache=True)
+def _heap_less(heap, i, j):
+    """
+    Ordering used by the heap: lowest total cost first, ties broken by lowest actual cost.
+    """
+    if heap[i, 0] != heap[j, 0]:
+        return heap[i, 0] < heap[j, 0]
+    return heap[i, 1] < heap[j, 1]
+
+
+@njit(cache=True)
+def _heap_swap(heap, i, j):
+    for k in range(4):
+        tmp = heap[i, k]
+        heap[i, k] = heap[j, k]
+        heap[j, k] = tmp
+
+
+@njit(cache=True)
+def _heappush(heap, size, f, g, r, c):
+    """
+    Push the row (f, g, r, c) onto the heap and return the new size of the heap.
+    """
+    heap[size, 0] = f
+    heap[size, 1] = g
+    heap[size, 2] = r
+    heap[size, 3] = c
+    i = size
+    while i > 0:
+        parent = (i - 1) // 2
+        if not _heap_less(heap, i, parent):
+            break
+        _heap_swap(heap, i, parent)
+        i = parent
+    return size + 1
+
+
+@njit(cache=True)
+def _heappop(heap, size):
+    """
+    Move the smallest row to index `size - 1` and restore the heap property for the remaining rows.
+    Returns the new size of the heap, the popped row can then be read at heap[size].
+    """
+    size -= 1
+    _heap_swap(heap, 0, size)
+    i = 0
+    while True:
+        left = 2 * i + 1
+        right = left + 1
+        smallest = i
+        if left < size and _heap_less(heap, left, smallest):
+            smallest = left
+        if right < size and _heap_less(heap, right, smallest):
+            smallest = right
+        if smallest == i:
+            break
+        _heap_swap(heap, i, smallest)
+        i = smallest
+    return size
+
+
+@njit(cache=True, inline='always')
+def _relax(grid, g_score, parent, heap, size, g, r, c, nr, nc, gr, gc, mode):
+    """
+    Relax the neighbor (nr, nc) of the cell (r, c) that has actual cost g.
+    Returns the new size of the heap.
+    """
+    H, W = grid.shape
+    if nr < 0 or nr >= H or nc < 0 or nc >= W:
+        return size
+    cost = grid[nr, nc]
+    # Skips the walls (cost -1)
+    if cost < 0:
+        return size
+
+    tentative = g + cost
+    if tentative >= g_score[nr, nc]:
+        return size
+    g_score[nr, nc] = tentative
+    parent[nr * W + nc] = r * W + c
+
+    dr = abs(nr - gr)
+    dc = abs(nc - gc)
+    if mode == 1:
+        h = dr + dc
+    else:
+        # Costs are integers, so rounding the distance down keeps it admissible
+        h = int(np.sqrt(dr * dr + dc * dc))
+    return _heappush(heap, size, tentative + h, tentative, nr, nc)
+
+
+@njit(cache=True)
+def astar(grid, sr, sc, gr, gc, mode):
+    """
+    Numba compiled A* search over the integer map.
+
+    Parameters:
+        grid: 2D integer array of cell costs, walls are -1
+        sr, sc: row and column of the start position
+        gr, gc: row and column of the goal position
+        mode: The heuristic calculation mode
+            - 1: Manhattan distance
+            - 2: Euclidean distance, rounded down
+
+    Returns:
+        parent: int32 array of length H * W holding the index (r * W + c) of the cell each cell was reached from (-1 for none)
+    """
+    H, W = grid.shape
+    parent = np.full(H * W, -1, dtype=np.int32)
+    g_score = np.full((H, W), INT_MAX, dtype=np.int32)
+
+    # With lazy deletion every relaxation pushes a row, so each cell is pushed at most once per neighbor
+    heap = np.empty((4 * H * W + 1, 4), dtype=np.int32)
+    size = 0
+
+    g_score[sr, sc] = 0
+    size = _heappush(heap, size, 0, 0, sr, sc)
+
+    while size > 0:
+        size = _heappop(heap, size)
+        g = heap[size, 1]
+        r = heap[size, 2]
+        c = heap[size, 3]
+
+        # Skip stale entries
+        if g > g_score[r, c]:
+            continue
+
+        if r == gr and c == gc:
+            break
+
+        # The four neighbors are written out so each call can be inlined
+        size = _relax(grid, g_score, parent, heap, size, g, r, c, r - 1, c, gr, gc, mode)
+        size = _relax(grid, g_score, parent, heap, size, g, r, c, r + 1, c, gr, gc, mode)
+        size = _relax(grid, g_score, parent, heap, size, g, r, c, r, c - 1, gr, gc, mode)
+        size = _relax(grid, g_score, parent, heap, size, g, r, c, r, c + 1, gr, gc, mode)
+
+    return parent
+
+
+def a_star(map, start, goal, heuristic_mode):
+    """
+    Same interface as a_star.a_star, but runs the search with the compiled astar kernel.
+
+    Parameters:
+        map: map_obj
+        start: tuple(x,y) of the start position
+        goal: tuple(x,y) of the goal position
+        heuristic_mode: 1 for manhattan, 2 for euclidian
+
+    Returns:
+        A list of coordinates representing the path from start to goal
+        If no path is found it returns None
+    """
+    W = map.int_map.shape[1]
+    parent = astar(map.int_map, start[0], start[1], goal[0], goal[1], heuristic_mode)
+    goal_idx = goal[0] * W + goal[1]
+    if goal_idx != start[0] * W + start[1] and parent[goal_idx] == -1:
+        return None
+    return path_to_goal(parent, goal_idx, W)
+
+
+if __name__ == "__main__":
+    task = 4
+    samfundet_map1 = Map_Obj(task)
+    start = samfundet_map1.get_start_pos()
+    goal = samfundet_map1.get_goal_pos()
+    #The last parameter in a_star() is the heuristic mode (1 for manhattan, 2 for euclidian)
+    path = a_star(samfundet_map1, start, goal, 1)
+    if path:
+        for pos in path:
+            if pos == path[0] or pos == path[len(path) - 1]:
+                continue
+            samfundet_map1.set_cell_value(pos, ' G ')
+
+    print(f'Task: {task}')
+    print(f' Cost: {len(path)}')
+    samfundet_map1.show_map()